@@ -0,0 +1,112 @@
+# benchmark_dashboard.py
+# Measures bytes on the wire and latency of one dashboard refresh against a running backend
+
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+# Each scenario is (label, request headers, include bodies, send If-None-Match).
+# The baseline reproduces the old behaviour: every body on every refresh, no
+# compression and no revalidation. /emails/db no longer returns bodies, so the
+# baseline loads them through /emails/db/{id}. That adds one request per email,
+# so the baseline latency is an upper bound, but the byte count matches.
+SCENARIOS = [
+    ("baseline: bodies, no ETag", {}, True, False),
+    ("bodies, ETag", {}, True, True),
+    ("list view, ETag", {}, False, True),
+    ("list view, ETag, gzip", {"Accept-Encoding": "gzip"}, False, True),
+    ("list view, ETag, brotli", {"Accept-Encoding": "br, gzip"}, False, True),
+]
+
+def request(url: str, headers: Dict[str, str]) -> Tuple[int, int, float, Optional[str]]:
+    """
+    GET a URL and report what was actually transferred.
+    urllib does not decompress, so the byte count is the encoded payload size.
+    Returns:
+        Tuple[int, int, float, Optional[str]]: Status, bytes, seconds, ETag.
+    """
+    req = urllib.request.Request(url, headers=headers)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req) as resp:
+            payload = resp.read()
+            return resp.status, len(payload), time.perf_counter() - start, resp.headers.get("ETag")
+    except urllib.error.HTTPError as e:
+        # 304 Not Modified is raised as an HTTPError by urllib
+        payload = e.read()
+        return e.code, len(payload), time.perf_counter() - start, e.headers.get("ETag")
+
+def refresh_urls(base_url: str, max_results: int, include_body: bool, db_ids: List[str], summary_ids: List[str]) -> List[str]:
+    """
+    URLs the dashboard requests on one refresh.
+    """
+    urls = [
+        f"{base_url}/emails?max_results={max_results}&include_body={str(include_body).lower()}",
+        f"{base_url}/emails/db?limit={max_results}",
+    ]
+    if include_body:
+        urls += [f"{base_url}/emails/db/{email_id}" for email_id in db_ids]
+    urls += [f"{base_url}/summaries/{email_id}" for email_id in summary_ids]
+    return urls
+
+def run_refresh(urls: List[str], headers: Dict[str, str], etags: Optional[Dict[str, str]]) -> Tuple[int, float, int]:
+    """
+    Perform one refresh, sending If-None-Match for any ETag seen before.
+    Pass etags=None to disable revalidation.
+    Returns:
+        Tuple[int, float, int]: Total bytes, total seconds, number of 304s.
+    """
+    total_bytes, total_time, not_modified = 0, 0.0, 0
+    for url in urls:
+        req_headers = dict(headers)
+        if etags is not None and url in etags:
+            req_headers["If-None-Match"] = etags[url]
+        status, size, elapsed, etag = request(url, req_headers)
+        total_bytes += size
+        total_time += elapsed
+        if status == 304:
+            not_modified += 1
+        if etag and etags is not None:
+            etags[url] = etag
+    return total_bytes, total_time, not_modified
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard refresh cost.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--max-results", type=int, default=50)
+    parser.add_argument("--summaries", type=int, default=10, help="Summary lists fetched per refresh")
+    parser.add_argument("--refreshes", type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        with urllib.request.urlopen(f"{args.base_url}/emails/db?limit={args.max_results}") as resp:
+            db_ids = [e["id"] for e in json.loads(resp.read())]
+    except urllib.error.HTTPError as e:
+        raise SystemExit(f"GET /emails/db failed with HTTP {e.code}: {e.read().decode(errors='replace')}")
+    except urllib.error.URLError as e:
+        raise SystemExit(f"Backend not reachable at {args.base_url}: {e}")
+
+    summary_ids = db_ids[:args.summaries]
+
+    print(f"{'scenario':<30} {'first KB':>9} {'first ms':>9} {'repeat KB':>10} {'repeat ms':>10} {'304s':>5}")
+    for label, headers, include_body, revalidate in SCENARIOS:
+        urls = refresh_urls(args.base_url, args.max_results, include_body, db_ids, summary_ids)
+        etags: Optional[Dict[str, str]] = {} if revalidate else None
+        first_bytes, first_time, _ = run_refresh(urls, headers, etags)
+        repeat_bytes, repeat_time, hits = 0, 0.0, 0
+        for _ in range(args.refreshes):
+            b, t, n = run_refresh(urls, headers, etags)
+            repeat_bytes += b
+            repeat_time += t
+            hits += n
+        print(
+            f"{label:<30} {first_bytes / 1024:>9.1f} {first_time * 1000:>9.1f} "
+            f"{repeat_bytes / args.refreshes / 1024:>10.1f} {repeat_time / args.refreshes * 1000:>10.1f} "
+            f"{hits / args.refreshes:>5.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,126 @@
 # crud.py
-# CRUD operations for Email and Summary models
+# CRUD operations for Email, Thread, Summary and daily digest models
 
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from models import Email, Summary
-from typing import List, Optional
+from models import Email, Thread, Summary, DailyRollup, Digest, MailboxVersion
+from typing import List, Optional, Tuple
+from datetime import date, datetime, timezone
+import email.utils
+
+def get_mailbox_version(db: Session) -> int:
+    """
+    Get the current stored-mailbox version.
+    Args:
+        db (Session): SQLAlchemy session.
+    Returns:
+        int: The version counter (0 if nothing has been written yet).
+    """
+    row = db.query(MailboxVersion).filter(MailboxVersion.id == 1).first()
+    return row.version if row else 0
+
+def seed_mailbox_version(db: Session) -> None:
+    """
+    Make sure the single mailbox version row exists. Called once at startup so
+    writes only ever need to UPDATE it.
+    Args:
+        db (Session): SQLAlchemy session.
+    """
+    if db.query(MailboxVersion).filter(MailboxVersion.id == 1).first() is not None:
+        return
+    try:
+        db.add(MailboxVersion(id=1, version=0))
+        db.commit()
+    except IntegrityError:
+        # Another worker seeded it first
+        db.rollback()
+
+def bump_mailbox_version(db: Session) -> None:
+    """
+    Increment the stored-mailbox version as part of the caller's transaction.
+    Args:
+        db (Session): SQLAlchemy session.
+    """
+    db.query(MailboxVersion).filter(MailboxVersion.id == 1).update(
+        {MailboxVersion.version: MailboxVersion.version + 1}, synchronize_session=False
+    )
+
+def _parse_received_at(value):
+    """
+    Convert a Gmail Date header (RFC 2822) to a naive UTC datetime for the DateTime column.
+    """
+    if not isinstance(value, str):
+        return value
+    try:
+        dt = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def _add_email(db: Session, email_data: dict) -> Email:
+    """
+    Add an Email (and its Thread membership) to the session without committing.
+    """
+    email_data = dict(email_data)
+    thread_id = email_data.pop('thread_id', None) or None
+    email_data['received_at'] = _parse_received_at(email_data.get('received_at'))
+    db_email = Email(**email_data, thread_id=thread_id)
+    if thread_id:
+        db_thread = get_thread(db, thread_id)
+        if db_thread is None:
+            db_thread = Thread(id=thread_id, subject=email_data.get('subject', ''), message_count=0)
+            db.add(db_thread)
+            db.flush()
+        db_thread.message_count = (db_thread.message_count or 0) + 1
+    db.add(db_email)
+    return db_email
 
 def create_email(db: Session, email_data: dict) -> Email:
     """
     Create and store a new Email record in the database.
+    If the email carries a thread_id, it is added to that Thread (created on first use).
     Args:
         db (Session): SQLAlchemy session.
         email_data (dict): Dictionary with email fields.
     Returns:
         Email: The created Email object.
     """
-    db_email = Email(**email_data)
-    db.add(db_email)
+    db_email = _add_email(db, email_data)
+    bump_mailbox_version(db)
     db.commit()
     db.refresh(db_email)
     return db_email
 
+def store_fetched_emails(db: Session, emails: List[dict]) -> int:
+    """
+    Store emails fetched from Gmail that are not in the database yet, with their
+    thread membership. Existing rows only get their body filled in if it was missing.
+    Args:
+        db (Session): SQLAlchemy session.
+        emails (List[dict]): Email dictionaries as returned by fetch_emails.
+    Returns:
+        int: Number of emails inserted or updated.
+    """
+    ids = [e['id'] for e in emails]
+    existing = {e.id: e for e in db.query(Email).filter(Email.id.in_(ids)).all()} if ids else {}
+    fields = {'id', 'thread_id', 'subject', 'sender', 'snippet', 'body', 'received_at'}
+    changed = 0
+    for email_data in emails:
+        db_email = existing.get(email_data['id'])
+        if db_email is None:
+            existing[email_data['id']] = _add_email(db, {k: v for k, v in email_data.items() if k in fields})
+            changed += 1
+        elif not db_email.body and email_data.get('body'):
+            db_email.body = email_data['body']
+            changed += 1
+    if changed:
+        bump_mailbox_version(db)
+        db.commit()
+    return changed
+
 def get_email(db: Session, email_id: str) -> Optional[Email]:
     """
     Retrieve an Email by its ID.
@@ -43,6 +144,63 @@ def list_emails(db: Session, skip: int = 0, limit: int = 10) -> List[Email]:
     """
     return db.query(Email).offset(skip).limit(limit).all()
 
+def get_thread(db: Session, thread_id: str) -> Optional[Thread]:
+    """
+    Retrieve a Thread by its Gmail threadId.
+    Args:
+        db (Session): SQLAlchemy session.
+        thread_id (str): Gmail thread ID.
+    Returns:
+        Optional[Thread]: The Thread object if found, else None.
+    """
+    return db.query(Thread).filter(Thread.id == thread_id).first()
+
+def list_threads(db: Session, skip: int = 0, limit: int = 10) -> List[Thread]:
+    """
+    List threads with pagination, most recently updated first.
+    Args:
+        db (Session): SQLAlchemy session.
+        skip (int): Number of records to skip.
+        limit (int): Max number of records to return.
+    Returns:
+        List[Thread]: List of Thread objects.
+    """
+    return db.query(Thread).order_by(Thread.updated_at.desc()).offset(skip).limit(limit).all()
+
+def list_thread_emails(db: Session, thread_id: str, unsummarized_only: bool = False) -> List[Email]:
+    """
+    List the emails that belong to a thread.
+    Args:
+        db (Session): SQLAlchemy session.
+        thread_id (str): Gmail thread ID.
+        unsummarized_only (bool): Only return emails not yet folded into the thread summary.
+    Returns:
+        List[Email]: Member emails ordered by received time.
+    """
+    query = db.query(Email).filter(Email.thread_id == thread_id)
+    if unsummarized_only:
+        query = query.filter(Email.thread_summarized.isnot(True))
+    return query.order_by(Email.received_at).all()
+
+def update_thread_summary(db: Session, db_thread: Thread, summary_text: str, emails: List[Email]) -> Thread:
+    """
+    Store a new rolling summary for a thread and mark the given emails as folded in.
+    Args:
+        db (Session): SQLAlchemy session.
+        db_thread (Thread): The thread being summarized.
+        summary_text (str): The updated thread summary.
+        emails (List[Email]): The emails covered by this update.
+    Returns:
+        Thread: The updated Thread object.
+    """
+    db_thread.summary = summary_text
+    for db_email in emails:
+        db_email.thread_summarized = True
+    bump_mailbox_version(db)
+    db.commit()
+    db.refresh(db_thread)
+    return db_thread
+
 def create_summary(db: Session, email_id: str, summary_text: str) -> Summary:
     """
     Create and store a new Summary for an email.
@@ -55,6 +213,7 @@ def create_summary(db: Session, email_id: str, summary_text: str) -> Summary:
     """
     db_summary = Summary(email_id=email_id, summary=summary_text)
     db.add(db_summary)
+    bump_mailbox_version(db)
     db.commit()
     db.refresh(db_summary)
     return db_summary
@@ -68,4 +227,136 @@ def list_summaries(db: Session, email_id: str) -> List[Summary]:
     Returns:
         List[Summary]: List of Summary objects.
     """
-    return db.query(Summary).filter(Summary.email_id == email_id).all() 
\ No newline at end of file
+    return db.query(Summary).filter(Summary.email_id == email_id).all() 
+
+def list_day_summaries(db: Session, day: date) -> List[Tuple[Summary, str]]:
+    """
+    List the summaries that belong to a day's digest, with their current category.
+    The day comes from the email's received date (falling back to the summary
+    creation time) and the category is read at query time, so reclassified
+    emails move to their new bucket.
+    Args:
+        db (Session): SQLAlchemy session.
+        day (date): The digest day.
+    Returns:
+        List[Tuple[Summary, str]]: (summary, category) pairs ordered by summary ID.
+    """
+    summary_day = func.coalesce(func.date(Email.received_at), func.date(Summary.created_at))
+    rows = (
+        db.query(Summary, Email.category)
+        .outerjoin(Email, Summary.email_id == Email.id)
+        .filter(summary_day == day)
+        .order_by(Summary.id)
+        .all()
+    )
+    return [(summary, category or "other") for summary, category in rows]
+
+def get_or_create_daily_rollup(db: Session, day: date, category: str) -> DailyRollup:
+    """
+    Get the rollup for a day and category, creating it if needed.
+    Args:
+        db (Session): SQLAlchemy session.
+        day (date): The digest day.
+        category (str): The email category.
+    Returns:
+        DailyRollup: The rollup row.
+    """
+    query = db.query(DailyRollup).filter(DailyRollup.day == day, DailyRollup.category == category)
+    rollup = query.first()
+    if rollup is not None:
+        return rollup
+    try:
+        rollup = DailyRollup(day=day, category=category)
+        db.add(rollup)
+        db.commit()
+    except IntegrityError:
+        # Another request created it first
+        db.rollback()
+        rollup = query.first()
+    return rollup
+
+def list_folded_summary_ids(db: Session, rollup_ids: List[int]) -> List[Tuple[int, int]]:
+    """
+    List the summaries already folded into any of the given rollups.
+    Args:
+        db (Session): SQLAlchemy session.
+        rollup_ids (List[int]): Rollup IDs.
+    Returns:
+        List[Tuple[int, int]]: (summary ID, rollup ID) pairs.
+    """
+    if not rollup_ids:
+        return []
+    return (
+        db.query(Summary.id, Summary.digest_rollup_id)
+        .filter(Summary.digest_rollup_id.in_(rollup_ids))
+        .all()
+    )
+
+def update_rollup_section(db: Session, rollup: DailyRollup, section: Optional[str], summaries: List[Summary], reset: bool = False) -> DailyRollup:
+    """
+    Store a rollup's new section and mark the given summaries as folded into it.
+    Args:
+        db (Session): SQLAlchemy session.
+        rollup (DailyRollup): The rollup row.
+        section (Optional[str]): The new section text (None when the bucket is empty).
+        summaries (List[Summary]): Summaries covered by this update.
+        reset (bool): Drop all previously folded summaries first (full rebuild).
+    Returns:
+        DailyRollup: The updated rollup row.
+    """
+    if reset:
+        db.query(Summary).filter(Summary.digest_rollup_id == rollup.id).update(
+            {Summary.digest_rollup_id: None}, synchronize_session=False
+        )
+    for db_summary in summaries:
+        db_summary.digest_rollup_id = rollup.id
+    rollup.section_summary = section
+    # Set explicitly so the digest sees a change even if the section text is unchanged
+    rollup.updated_at = datetime.utcnow()
+    db.commit()
+    db.refresh(rollup)
+    return rollup
+
+def list_daily_rollups(db: Session, day: date) -> List[DailyRollup]:
+    """
+    List all category rollups for a given day.
+    Args:
+        db (Session): SQLAlchemy session.
+        day (date): The digest day.
+    Returns:
+        List[DailyRollup]: Rollups for that day, ordered by category.
+    """
+    return db.query(DailyRollup).filter(DailyRollup.day == day).order_by(DailyRollup.category).all()
+
+def get_digest(db: Session, day: date) -> Optional[Digest]:
+    """
+    Retrieve the cached digest for a given day.
+    Args:
+        db (Session): SQLAlchemy session.
+        day (date): The digest day.
+    Returns:
+        Optional[Digest]: The Digest object if found, else None.
+    """
+    return db.query(Digest).filter(Digest.day == day).first()
+
+def save_digest(db: Session, day: date, content: str, email_count: int) -> Digest:
+    """
+    Create or replace the cached digest for a given day.
+    Args:
+        db (Session): SQLAlchemy session.
+        day (date): The digest day.
+        content (str): The digest text.
+        email_count (int): Number of summaries the digest covers.
+    Returns:
+        Digest: The stored Digest object.
+    """
+    db_digest = get_digest(db, day)
+    if db_digest is None:
+        db_digest = Digest(day=day)
+        db.add(db_digest)
+    db_digest.content = content
+    db_digest.email_count = email_count
+    db_digest.created_at = datetime.utcnow()
+    db.commit()
+    db.refresh(db_digest)
+    return db_digest
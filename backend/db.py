@@ -4,7 +4,7 @@
 import os
 from dotenv import load_dotenv
 from supabase import create_client, Client
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # Load environment variables from .env file
@@ -27,4 +27,23 @@ if not DATABASE_URL:
 
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base() 
\ No newline at end of file
+Base = declarative_base() 
+
+def add_missing_columns(metadata) -> None:
+    """
+    Add model columns that are missing from existing tables.
+    create_all() only creates missing tables, so columns added to a model later
+    (e.g. emails.thread_id) would otherwise break every query on that table.
+    Columns are added as plain nullable columns; safe to run on every startup.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
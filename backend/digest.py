@@ -0,0 +1,74 @@
+# digest.py
+# Builds daily digests by folding new per-email summaries into cached category sections
+
+from datetime import date
+from sqlalchemy.orm import Session
+
+from email_agent import summarize_digest_section, combine_digest_sections
+from models import Digest
+import crud
+
+# Categories are listed in this order in the reduce step
+CATEGORY_ORDER = ["important", "moderate", "other"]
+
+def build_daily_digest(db: Session, day: date) -> Digest:
+    """
+    Return the digest for a day, generating it only when needed.
+    Summaries are bucketed by their email's current category. For each bucket,
+    only summaries not yet folded into its cached section are sent to the LLM
+    together with that section; a bucket that lost a summary (e.g. after
+    reclassification) is rebuilt. The cached digest is returned unchanged when
+    no bucket changed since it was generated.
+    Args:
+        db (Session): SQLAlchemy session.
+        day (date): The digest day.
+    Returns:
+        Digest: The cached or newly generated digest.
+    Raises:
+        LookupError: If no summaries were stored for that day.
+        RuntimeError: If the LLM call fails; nothing is cached in that case.
+    """
+    members = {}
+    for db_summary, category in crud.list_day_summaries(db, day):
+        members.setdefault(category, []).append(db_summary)
+
+    rollups = {r.category: r for r in crud.list_daily_rollups(db, day)}
+    for category in members:
+        if category not in rollups:
+            rollups[category] = crud.get_or_create_daily_rollup(db, day, category)
+
+    # Summaries currently folded into each rollup, to spot ones that moved away
+    folded = {}
+    for summary_id, rollup_id in crud.list_folded_summary_ids(db, [r.id for r in rollups.values()]):
+        folded.setdefault(rollup_id, set()).add(summary_id)
+
+    for category, rollup in rollups.items():
+        current = members.get(category, [])
+        current_ids = {s.id for s in current}
+        reset = not folded.get(rollup.id, set()) <= current_ids
+        pending = current if reset else [s for s in current if s.digest_rollup_id != rollup.id]
+        if not pending and not reset:
+            continue
+        previous = "" if reset else (rollup.section_summary or "")
+        texts = [s.summary for s in pending if s.summary]
+        section = summarize_digest_section(category, texts, previous) if texts else (previous or None)
+        if section and section.startswith("[Digest error"):
+            raise RuntimeError(section)
+        crud.update_rollup_section(db, rollup, section, pending, reset=reset)
+
+    if not members:
+        raise LookupError(f"No summaries stored for {day.isoformat()}")
+
+    cached = crud.get_digest(db, day)
+    last_change = max(r.updated_at for r in rollups.values())
+    if cached is not None and cached.created_at >= last_change:
+        return cached
+
+    rank = {c: i for i, c in enumerate(CATEGORY_ORDER)}
+    ordered = sorted(rollups.values(), key=lambda r: rank.get(r.category, len(CATEGORY_ORDER)))
+    sections = {r.category: r.section_summary for r in ordered if r.section_summary}
+    content = combine_digest_sections(sections)
+    if content.startswith("[Digest error"):
+        raise RuntimeError(content)
+    email_count = sum(len(s) for s in members.values())
+    return crud.save_digest(db, day, content, email_count)
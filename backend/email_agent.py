@@ -2,6 +2,7 @@
 # Handles AI logic: summarization and classification
 
 import os
+import re
 import openai
 from dotenv import load_dotenv
 from notion_client import Client
@@ -41,6 +42,83 @@ def summarize_email(email_text: str) -> str:
     except Exception as e:
         return f"[Summary error: {e}]"
 
+# --- Thread summarization ---
+
+# "On <date>, <someone> wrote:" line that introduces quoted history in replies
+_REPLY_HEADER = re.compile(r"^On\s.+wrote:\s*$", re.DOTALL)
+# Outlook-style separators that introduce unquoted history
+_HISTORY_SEPARATOR = re.compile(r"^(-{2,}\s*Original Message\s*-{2,}|_{10,})\s*$", re.IGNORECASE)
+_OUTLOOK_HEADER = re.compile(r"^(From|Sent|Date|To|Cc|Subject):\s", re.IGNORECASE)
+
+def _starts_history(lines: list, i: int) -> bool:
+    """
+    Check whether lines[i] starts the quoted history of a reply.
+    """
+    line = lines[i].strip()
+    if _HISTORY_SEPARATOR.match(line):
+        return True
+    if line.startswith("On "):
+        # Gmail wraps long headers, e.g. "On <date> <name> <addr>\nwrote:"
+        for end in range(i, min(i + 3, len(lines))):
+            if _REPLY_HEADER.match(" ".join(l.strip() for l in lines[i:end + 1])):
+                return True
+    if line.lower().startswith("from:"):
+        # Outlook header block without a separator: "From:" followed by Sent/To/Subject
+        following = [l.strip() for l in lines[i + 1:i + 4]]
+        return sum(1 for l in following if _OUTLOOK_HEADER.match(l)) >= 2
+    return False
+
+def strip_quoted_text(email_text: str) -> str:
+    """
+    Drop the quoted reply history from an email body, keeping only new content.
+
+    Args:
+        email_text (str): The full text of the email.
+
+    Returns:
+        str: The email text without '>'-quoted lines and anything after a reply
+            header or Outlook-style history separator.
+    """
+    lines = email_text.splitlines()
+    kept = []
+    for i, line in enumerate(lines):
+        if _starts_history(lines, i):
+            break
+        if line.lstrip().startswith(">"):
+            continue
+        kept.append(line)
+    return "\n".join(kept).strip()
+
+def summarize_thread_update(previous_summary: str, new_messages: list) -> str:
+    """
+    Update a thread summary with new messages only, so the prompt size depends
+    on the new content rather than the length of the conversation.
+
+    Args:
+        previous_summary (str): The current thread summary ('' for a new thread).
+        new_messages (list): Texts of the messages not yet covered by the summary.
+
+    Returns:
+        str: The updated thread summary.
+    """
+    try:
+        new_content = "\n\n".join(f"Message {i + 1}:\n{strip_quoted_text(m)}" for i, m in enumerate(new_messages))
+        response = openai.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": (
+                    "You are an email summarizer maintaining a running summary of a conversation thread. "
+                    "Update the summary with the new messages, keeping decisions, open questions and action items."
+                )},
+                {"role": "user", "content": f"Current summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{new_content}"}
+            ],
+            max_tokens=200,
+            temperature=0.5,
+        )
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        return f"[Summary error: {e}]"
+
 # --- Classification ---
 
 def classify_email(email_text: str) -> str:
@@ -76,6 +154,83 @@ def classify_email(email_text: str) -> str:
     except Exception as e:
         return f"[Category error: {e}]"
 
+# --- Daily digest (map-reduce over cached summaries) ---
+
+DIGEST_CHUNK_SIZE = 20
+
+def _condense(system_prompt: str, texts: list, max_tokens: int) -> str:
+    """
+    Ask the model to condense a list of short texts into one passage.
+    """
+    joined = "\n".join(f"- {t}" for t in texts)
+    response = openai.chat.completions.create(
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": joined}
+        ],
+        max_tokens=max_tokens,
+        temperature=0.3,
+    )
+    return response.choices[0].message.content.strip()
+
+def summarize_digest_section(category: str, summaries: list, previous_section: str = "") -> str:
+    """
+    Map step: fold per-email summaries of one category into its digest section.
+    Only summaries not yet covered by previous_section should be passed in.
+    Large batches are condensed in chunks first, then the chunk outputs are
+    condensed again, so no single prompt grows with the size of the mailbox.
+
+    Args:
+        category (str): The email category ('important', 'moderate', 'other').
+        summaries (list): Cached per-email summary strings to add.
+        previous_section (str): The section built so far ('' for a new section).
+
+    Returns:
+        str: A short digest section for the category.
+    """
+    prompt = (
+        f"You are writing the '{category}' section of a daily email digest.\n"
+        "Each line is the summary of one email. Merge them into a brief, "
+        "de-duplicated overview, keeping action items and deadlines."
+    )
+    try:
+        texts = list(summaries)
+        while len(texts) > DIGEST_CHUNK_SIZE:
+            texts = [
+                _condense(prompt, texts[i:i + DIGEST_CHUNK_SIZE], 200)
+                for i in range(0, len(texts), DIGEST_CHUNK_SIZE)
+            ]
+        if previous_section:
+            update_prompt = (
+                f"{prompt}\nThe first line is the current section; update it with "
+                "the remaining lines and reply with the full updated section."
+            )
+            return _condense(update_prompt, [previous_section] + texts, 200)
+        return _condense(prompt, texts, 200)
+    except Exception as e:
+        return f"[Digest error: {e}]"
+
+def combine_digest_sections(sections: dict) -> str:
+    """
+    Reduce step: combine per-category sections into the final daily digest.
+
+    Args:
+        sections (dict): Mapping of category to its digest section.
+
+    Returns:
+        str: The daily digest text.
+    """
+    try:
+        prompt = (
+            "You are an email assistant writing a daily digest.\n"
+            "Each line is a category section. Write a concise digest that starts "
+            "with the important items, then moderate ones, then anything else."
+        )
+        return _condense(prompt, [f"{c}: {s}" for c, s in sections.items()], 400)
+    except Exception as e:
+        return f"[Digest error: {e}]"
+
 def to_iso8601(date_str):
     # Parse RFC 2822 date string to datetime object
     try:
@@ -38,12 +38,33 @@ def get_gmail_creds() -> Credentials:
     )
     return creds
 
-def fetch_emails(user_id: str = 'me', max_results: int = 10) -> List[Dict]:
+def get_mailbox_history_id(user_id: str = 'me') -> str:
+    """
+    Get the mailbox's current historyId, which Gmail advances on every change
+    (new mail, label changes such as read/unread, deletions).
+    Args:
+        user_id (str): Gmail user ID (default is 'me').
+    Returns:
+        str: The current historyId.
+    Raises:
+        Exception: If Gmail API call fails or credentials are missing.
+    """
+    try:
+        creds = get_gmail_creds()
+        service = build('gmail', 'v1', credentials=creds)
+        profile = service.users().getProfile(userId=user_id).execute()
+        return str(profile.get('historyId', ''))
+    except Exception as e:
+        raise Exception(f"Failed to read mailbox history: {e}")
+
+def fetch_emails(user_id: str = 'me', max_results: int = 10, include_body: bool = True) -> List[Dict]:
     """
     Fetch unread emails from Gmail using the Gmail API.
     Args:
         user_id (str): Gmail user ID (default is 'me' for authenticated user).
         max_results (int): Maximum number of emails to fetch.
+        include_body (bool): If False, only headers and snippet are requested
+            from Gmail and 'body' is omitted from the results.
     Returns:
         List[Dict]: List of unread email data dictionaries (id, snippet, headers, body, etc.).
     Raises:
@@ -59,7 +80,15 @@ def fetch_emails(user_id: str = 'me', max_results: int = 10) -> List[Dict]:
             return []
         emails = []
         for msg in messages:
-            msg_detail = service.users().messages().get(userId=user_id, id=msg['id'], format='full').execute()
+            if include_body:
+                msg_detail = service.users().messages().get(userId=user_id, id=msg['id'], format='full').execute()
+            else:
+                msg_detail = service.users().messages().get(
+                    userId=user_id,
+                    id=msg['id'],
+                    format='metadata',
+                    metadataHeaders=['Subject', 'From', 'Date'],
+                ).execute()
             headers = msg_detail.get('payload', {}).get('headers', [])
             subject = ''
             sender = ''
@@ -73,17 +102,38 @@ def fetch_emails(user_id: str = 'me', max_results: int = 10) -> List[Dict]:
                     received_at = header.get('value', '')
             email_data = {
                 'id': msg_detail['id'],
+                'thread_id': msg_detail.get('threadId', ''),
                 'subject': subject,
                 'sender': sender,
                 'received_at': received_at,
                 'snippet': msg_detail.get('snippet', ''),
-                'body': extract_body(msg_detail),
             }
+            if include_body:
+                email_data['body'] = extract_body(msg_detail)
             emails.append(email_data)
         return emails
     except Exception as e:
         raise Exception(f"Failed to fetch emails: {e}")
 
+def fetch_email_body(email_id: str, user_id: str = 'me') -> str:
+    """
+    Fetch the plain text body of a single Gmail message.
+    Args:
+        email_id (str): The Gmail message ID.
+        user_id (str): Gmail user ID (default is 'me').
+    Returns:
+        str: The plain text body of the email.
+    Raises:
+        Exception: If Gmail API call fails or credentials are missing.
+    """
+    try:
+        creds = get_gmail_creds()
+        service = build('gmail', 'v1', credentials=creds)
+        msg_detail = service.users().messages().get(userId=user_id, id=email_id, format='full').execute()
+        return extract_body(msg_detail)
+    except Exception as e:
+        raise Exception(f"Failed to fetch email body: {e}")
+
 def extract_body(msg_detail: Dict) -> str:
     """
     Extract the plain text body from a Gmail message payload.
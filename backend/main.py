@@ -1,13 +1,17 @@
-from fastapi import FastAPI, HTTPException, Depends, Body, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, Depends, Body, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Optional
+from datetime import date, datetime
 from sqlalchemy.orm import Session
 
-from gmail_api import fetch_emails, mark_email_as_read, delete_email
+from gmail_api import fetch_emails, fetch_email_body, get_mailbox_history_id, mark_email_as_read, delete_email
 from email_agent import summarize_email, classify_email, create_notion_task_for_email
-from db import SessionLocal, Base, engine
+from db import SessionLocal, Base, engine, add_missing_columns
 from models import Email, Summary
+from digest import build_daily_digest
+from threads import summarize_thread
 import crud
 
 # Create FastAPI app instance
@@ -20,10 +24,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
-# Create DB tables if they don't exist
+# Compress JSON responses; prefer brotli when brotli-asgi is installed
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=500)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=500)
+
+# Create DB tables if they don't exist, and add columns introduced since they were created
 Base.metadata.create_all(bind=engine)
+add_missing_columns(Base.metadata)
+with SessionLocal() as _db:
+    crud.seed_mailbox_version(_db)
 
 def get_db():
     """
@@ -35,9 +50,42 @@ def get_db():
     finally:
         db.close()
 
+def cache_headers(etag: str) -> Dict[str, str]:
+    """
+    Headers that let clients cache a response but revalidate it on every use.
+    """
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check the request's If-None-Match header against an ETag (weak comparison).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
 class EmailTextRequest(BaseModel):
     email_text: str
 
+class EmailListItem(BaseModel):
+    id: str
+    subject: Optional[str] = ""
+    sender: Optional[str] = ""
+    snippet: Optional[str] = ""
+    received_at: Optional[datetime] = None
+    category: Optional[str] = None
+    thread_id: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+class EmailDetail(EmailListItem):
+    body: Optional[str] = ""
+
 class EmailInDB(BaseModel):
     id: str
     subject: str = ""
@@ -46,6 +94,7 @@ class EmailInDB(BaseModel):
     body: str = ""
     received_at: str = ""
     category: str = ""
+    thread_id: Optional[str] = None
 
     class Config:
         orm_mode = True
@@ -54,7 +103,34 @@ class SummaryInDB(BaseModel):
     id: int
     email_id: str
     summary: str
-    created_at: str
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class ThreadInDB(BaseModel):
+    id: str
+    subject: Optional[str] = ""
+    message_count: int = 0
+    summary: Optional[str] = None
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class ThreadDetail(BaseModel):
+    id: str
+    subject: Optional[str] = ""
+    message_count: int = 0
+    summary: Optional[str] = None
+    updated_at: datetime
+    email_ids: List[str] = []
+
+class DigestInDB(BaseModel):
+    day: date
+    content: str
+    email_count: int
+    created_at: datetime
 
     class Config:
         orm_mode = True
@@ -74,21 +150,51 @@ def read_root():
     return {"message": "Smart Email Agent backend is running!"}
 
 @app.get("/emails", response_model=List[Dict])
-def get_emails(max_results: int = 10):
+def get_emails(request: Request, response: Response, max_results: int = 10, include_body: bool = True, db: Session = Depends(get_db)):
     """
-    Fetch a list of emails from the user's Gmail account (live fetch, not DB).
+    Fetch a list of emails from the user's Gmail account (live fetch).
+    Newly seen messages are stored with their thread membership, so /threads
+    follows what the dashboard has loaded.
+    The ETag follows the Gmail historyId, so an unchanged mailbox answers
+    If-None-Match with 304 without fetching any messages.
     Args:
         max_results (int): Maximum number of emails to fetch (default: 10).
+        include_body (bool): Include full body text (default: True). List views
+            can pass False and load bodies from /emails/{email_id}/body.
     Returns:
         List[Dict]: List of email data dictionaries.
     """
     try:
-        emails = fetch_emails(max_results=max_results)
+        etag = f'W/"gmail-{get_mailbox_history_id()}-{max_results}-{int(include_body)}"'
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=cache_headers(etag))
+        emails = fetch_emails(max_results=max_results, include_body=include_body)
+        try:
+            crud.store_fetched_emails(db, emails)
+        except Exception as e:
+            # Storing is best effort; the live list is still returned
+            db.rollback()
+            print(f"Failed to store fetched emails: {e}")
+        response.headers.update(cache_headers(etag))
         return emails
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/emails/save", response_model=EmailInDB)
+@app.get("/emails/{email_id}/body")
+def get_email_body(email_id: str):
+    """
+    Fetch the body of a single email from Gmail on demand.
+    Args:
+        email_id (str): The Gmail message ID.
+    Returns:
+        Dict: The email ID and its body text.
+    """
+    try:
+        return {"id": email_id, "body": fetch_email_body(email_id)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/emails/save", response_model=EmailDetail)
 def save_email(email: EmailInDB, db: Session = Depends(get_db)):
     """
     Save a fetched email to the database.
@@ -96,7 +202,7 @@ def save_email(email: EmailInDB, db: Session = Depends(get_db)):
         email (EmailInDB): Email data to save.
         db (Session): SQLAlchemy session.
     Returns:
-        EmailInDB: The saved email record.
+        EmailDetail: The saved email record.
     """
     try:
         db_email = crud.create_email(db, email.dict())
@@ -104,19 +210,43 @@ def save_email(email: EmailInDB, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/emails/db", response_model=List[EmailInDB])
-def list_emails_db(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+@app.get("/emails/db", response_model=List[EmailListItem])
+def list_emails_db(request: Request, response: Response, skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
     """
-    List emails stored in the database.
+    List emails stored in the database, without their bodies.
+    Supports If-None-Match against the stored-mailbox version.
     Args:
         skip (int): Number of records to skip.
         limit (int): Max number of records to return.
         db (Session): SQLAlchemy session.
     Returns:
-        List[EmailInDB]: List of emails from the database.
+        List[EmailListItem]: List of emails from the database.
     """
+    etag = f'W/"db-{crud.get_mailbox_version(db)}-emails-{skip}-{limit}"'
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    response.headers.update(cache_headers(etag))
     return crud.list_emails(db, skip=skip, limit=limit)
 
+@app.get("/emails/db/{email_id}", response_model=EmailDetail)
+def get_email_db(email_id: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    """
+    Get a single stored email, including its body.
+    Args:
+        email_id (str): ID of the email.
+        db (Session): SQLAlchemy session.
+    Returns:
+        EmailDetail: The stored email record.
+    """
+    etag = f'W/"db-{crud.get_mailbox_version(db)}-email-{email_id}"'
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    db_email = crud.get_email(db, email_id)
+    if db_email is None:
+        raise HTTPException(status_code=404, detail="Email not found")
+    response.headers.update(cache_headers(etag))
+    return db_email
+
 @app.post("/summarize")
 def summarize(request: EmailTextRequest):
     """
@@ -147,17 +277,97 @@ def save_summary(email_id: str, summary: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/summaries/{email_id}", response_model=List[SummaryInDB])
-def list_summaries(email_id: str, db: Session = Depends(get_db)):
+def list_summaries(email_id: str, request: Request, response: Response, db: Session = Depends(get_db)):
     """
     List all summaries for a given email from the database.
+    Supports If-None-Match against the stored-mailbox version.
     Args:
         email_id (str): ID of the email.
         db (Session): SQLAlchemy session.
     Returns:
         List[SummaryInDB]: List of summaries for the email.
     """
+    etag = f'W/"db-{crud.get_mailbox_version(db)}-summaries-{email_id}"'
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    response.headers.update(cache_headers(etag))
     return crud.list_summaries(db, email_id=email_id)
 
+@app.get("/threads", response_model=List[ThreadInDB])
+def list_threads(request: Request, response: Response, skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+    """
+    List stored conversation threads with their rolling summaries.
+    Supports If-None-Match against the stored-mailbox version.
+    Args:
+        skip (int): Number of records to skip.
+        limit (int): Max number of records to return.
+        db (Session): SQLAlchemy session.
+    Returns:
+        List[ThreadInDB]: List of threads, most recently updated first.
+    """
+    etag = f'W/"db-{crud.get_mailbox_version(db)}-threads-{skip}-{limit}"'
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    response.headers.update(cache_headers(etag))
+    return crud.list_threads(db, skip=skip, limit=limit)
+
+@app.get("/threads/{thread_id}", response_model=ThreadDetail)
+def get_thread(thread_id: str, db: Session = Depends(get_db)):
+    """
+    Get a stored thread and the IDs of its member emails.
+    Args:
+        thread_id (str): Gmail thread ID.
+        db (Session): SQLAlchemy session.
+    Returns:
+        ThreadDetail: The thread with its message membership.
+    """
+    db_thread = crud.get_thread(db, thread_id)
+    if db_thread is None:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    return ThreadDetail(
+        id=db_thread.id,
+        subject=db_thread.subject,
+        message_count=db_thread.message_count or 0,
+        summary=db_thread.summary,
+        updated_at=db_thread.updated_at,
+        email_ids=[e.id for e in crud.list_thread_emails(db, thread_id)],
+    )
+
+@app.post("/threads/{thread_id}/summarize", response_model=ThreadInDB)
+def summarize_thread_endpoint(thread_id: str, db: Session = Depends(get_db)):
+    """
+    Update a thread's summary with the messages saved since the last update.
+    Args:
+        thread_id (str): Gmail thread ID.
+        db (Session): SQLAlchemy session.
+    Returns:
+        ThreadInDB: The thread with its updated summary.
+    """
+    try:
+        return summarize_thread(db, thread_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/digest/{day}", response_model=DigestInDB)
+def get_digest(day: date, db: Session = Depends(get_db)):
+    """
+    Get the daily digest for a date (YYYY-MM-DD), generating it on first request.
+    Built from the stored per-email summaries, not the raw email bodies.
+    Args:
+        day (date): The digest date.
+        db (Session): SQLAlchemy session.
+    Returns:
+        DigestInDB: The cached or newly generated digest.
+    """
+    try:
+        return build_daily_digest(db, day)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/classify")
 def classify(request: EmailTextRequest):
     """
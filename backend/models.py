@@ -1,7 +1,7 @@
 # models.py
-# SQLAlchemy models for emails and summaries
+# SQLAlchemy models for emails, threads, summaries, daily digests and mailbox state
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, Date, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from db import Base
@@ -19,8 +19,27 @@ class Email(Base):
     body = Column(Text)
     received_at = Column(DateTime, default=datetime.utcnow)
     category = Column(String, index=True)
+    thread_id = Column(String, ForeignKey('threads.id'), index=True)
+    # Whether this message has been folded into its thread's summary
+    thread_summarized = Column(Boolean, default=False)
     # Relationship to summaries
     summaries = relationship("Summary", back_populates="email")
+    # Relationship to thread
+    thread = relationship("Thread", back_populates="emails")
+
+class Thread(Base):
+    """
+    SQLAlchemy model for a Gmail conversation (threadId) and its rolling summary.
+    """
+    __tablename__ = 'threads'
+
+    id = Column(String, primary_key=True, index=True)
+    subject = Column(String, index=True)
+    message_count = Column(Integer, default=0)
+    summary = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Relationship to member emails
+    emails = relationship("Email", back_populates="thread")
 
 class Summary(Base):
     """
@@ -32,5 +51,46 @@ class Summary(Base):
     email_id = Column(String, ForeignKey('emails.id'))
     summary = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Daily rollup whose cached section already includes this summary
+    digest_rollup_id = Column(Integer, ForeignKey('daily_rollups.id'), index=True)
     # Relationship to email
-    email = relationship("Email", back_populates="summaries") 
\ No newline at end of file
+    email = relationship("Email", back_populates="summaries")
+
+class DailyRollup(Base):
+    """
+    SQLAlchemy model for the cached digest section of one day and category.
+    Summaries folded into the section point back here via Summary.digest_rollup_id,
+    so later builds only send the summaries that are not folded in yet.
+    """
+    __tablename__ = 'daily_rollups'
+    __table_args__ = (UniqueConstraint('day', 'category', name='uq_daily_rollup_day_category'),)
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    day = Column(Date, index=True, nullable=False)
+    category = Column(String, index=True, nullable=False)
+    # Cached "map" output for this category
+    section_summary = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Digest(Base):
+    """
+    SQLAlchemy model for a generated daily digest.
+    Regenerated only when one of the day's rollups changes.
+    """
+    __tablename__ = 'digests'
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    day = Column(Date, unique=True, index=True, nullable=False)
+    content = Column(Text)
+    email_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class MailboxVersion(Base):
+    """
+    Single-row counter bumped on every write to stored emails or summaries.
+    Used to build ETags for the dashboard list endpoints.
+    """
+    __tablename__ = 'mailbox_version'
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
@@ -0,0 +1,34 @@
+# threads.py
+# Incremental per-thread summarization built on stored thread membership
+
+from sqlalchemy.orm import Session
+
+from email_agent import summarize_thread_update
+from models import Thread
+import crud
+
+def summarize_thread(db: Session, thread_id: str) -> Thread:
+    """
+    Bring a thread's rolling summary up to date.
+    Only messages not yet folded into the summary are sent to the LLM, together
+    with the previous summary; an up-to-date thread makes no LLM call at all.
+    Args:
+        db (Session): SQLAlchemy session.
+        thread_id (str): Gmail thread ID.
+    Returns:
+        Thread: The thread with its updated summary.
+    Raises:
+        LookupError: If the thread is not stored.
+        RuntimeError: If the LLM call fails; the previous summary is kept.
+    """
+    db_thread = crud.get_thread(db, thread_id)
+    if db_thread is None:
+        raise LookupError(f"Thread {thread_id} not found")
+    new_emails = crud.list_thread_emails(db, thread_id, unsummarized_only=True)
+    if not new_emails:
+        return db_thread
+    texts = [e.body or e.snippet or "" for e in new_emails]
+    summary = summarize_thread_update(db_thread.summary or "", texts)
+    if summary.startswith("[Summary error"):
+        raise RuntimeError(summary)
+    return crud.update_thread_summary(db, db_thread, summary, new_emails)